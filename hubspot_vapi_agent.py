@@ -1,19 +1,22 @@
 # hubspot_vapi_agent.py
-import os, json, time, requests
+import os, time, asyncio, hashlib, logging
+import httpx
+import orjson
+from cachetools import TTLCache
 from typing import Dict, List, Any, TypedDict, Optional
 
 from dotenv import load_dotenv
-load_dotenv()  
+load_dotenv()
 
 # --- LangGraph for HS → Vapi orchestration
 from langgraph.graph import StateGraph, END
 
-# --- LLM call 
+# --- LLM call
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
 # ───────────────────────────── ENV ─────────────────────────────
-HUBSPOT_ACCESS_TOKEN   = os.getenv("HUBSPOT_ACCESS_TOKEN")     
+HUBSPOT_ACCESS_TOKEN   = os.getenv("HUBSPOT_ACCESS_TOKEN")
 HUBSPOT_CLIENT_ID      = os.getenv("HUBSPOT_CLIENT_ID")
 HUBSPOT_CLIENT_SECRET  = os.getenv("HUBSPOT_CLIENT_SECRET")
 HUBSPOT_REFRESH_TOKEN  = os.getenv("HUBSPOT_REFRESH_TOKEN")
@@ -21,47 +24,123 @@ HUBSPOT_REFRESH_TOKEN  = os.getenv("HUBSPOT_REFRESH_TOKEN")
 VAPI_API_KEY           = os.getenv("VAPI_API_KEY")
 VAPI_WORKFLOW_ID       = os.getenv("VAPI_WORKFLOW_ID")
 BASE_URL               = os.getenv("BASE_URL", "").rstrip("/")
+VAPI_WEBHOOK_URL       = f"{BASE_URL}/webhook/vapi"
 
 CALL_SUMMARY_PROPERTY  = os.getenv("CALL_SUMMARY_PROPERTY", "contact_summary")
 HS_STATUS_OPEN_DEAL    = os.getenv("HS_STATUS_OPEN_DEAL", "OPEN_DEAL")
 HS_STATUS_UNQUALIFIED  = os.getenv("HS_STATUS_UNQUALIFIED", "UNQUALIFIED")
-HS_STATUS_CONTACTED    = os.getenv("HS_STATUS_CONTACTED", "CONNECTED")  
+HS_STATUS_CONTACTED    = os.getenv("HS_STATUS_CONTACTED", "CONNECTED")
 
 OPENAI_API_KEY         = os.getenv("OPENAI_API_KEY")
 
+logger = logging.getLogger(__name__)
+
+# ──────────────── Pooled async HTTP clients ───────────────────
+# One HTTP/2 client per upstream host, opened on server startup and shared
+# by every background task: connections are pooled + multiplexed and no
+# worker thread blocks on a socket read.
+HS_CLIENT: Optional[httpx.AsyncClient] = None
+VAPI_CLIENT: Optional[httpx.AsyncClient] = None
+
+def open_http_clients() -> None:
+    """Create the shared async clients. Called from FastAPI startup."""
+    global HS_CLIENT, VAPI_CLIENT
+    HS_CLIENT = httpx.AsyncClient(
+        base_url="https://api.hubapi.com",
+        http2=True,
+        timeout=30,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        headers={"Authorization": f"Bearer {HUBSPOT_ACCESS_TOKEN}"} if HUBSPOT_ACCESS_TOKEN else {},
+    )
+    VAPI_CLIENT = httpx.AsyncClient(
+        base_url="https://api.vapi.ai",
+        http2=True,
+        timeout=30,
+        limits=httpx.Limits(max_connections=16, max_keepalive_connections=8),
+        headers={"Authorization": f"Bearer {VAPI_API_KEY}"},
+    )
+
+async def close_http_clients() -> None:
+    """Drain batchers and close the shared async clients. Called from FastAPI shutdown."""
+    global HS_CLIENT, VAPI_CLIENT
+    # The two queues are independent, so drain them in parallel.
+    await asyncio.gather(CONTACT_UPDATE_BATCHER.aclose(), CALL_LOG_BATCHER.aclose())
+    if HS_CLIENT:
+        await HS_CLIENT.aclose()
+        HS_CLIENT = None
+    if VAPI_CLIENT:
+        await VAPI_CLIENT.aclose()
+        VAPI_CLIENT = None
+
+def _hs_client() -> httpx.AsyncClient:
+    if HS_CLIENT is None:
+        open_http_clients()
+    return HS_CLIENT
+
+def _vapi_client() -> httpx.AsyncClient:
+    if VAPI_CLIENT is None:
+        open_http_clients()
+    return VAPI_CLIENT
+
 # ───────────────── HubSpot OAuth auto‑refresh ─────────────────
 class HubSpotTokenManager:
-    """Holds/refreshes HubSpot OAuth access token."""
+    """Holds/refreshes HubSpot OAuth access token, tracking expiry so valid
+    tokens are reused and concurrent background tasks share one refresh."""
     def __init__(self, access_token: Optional[str]):
         self._access_token = access_token
+        # Unknown expiry for the env-provided token: treat as valid until a 401.
+        self._expires_at: float = float("inf") if access_token else 0.0
+        self._lock = asyncio.Lock()
 
     @property
     def access_token(self) -> Optional[str]:
         return self._access_token
 
-    def refresh(self) -> str:
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self._expires_at
+
+    def invalidate(self) -> None:
+        """Mark the cached token stale (e.g. after a 401) so the next refresh runs."""
+        self._expires_at = 0.0
+
+    async def ensure_fresh(self) -> None:
+        """Refresh proactively when the cached token is past its TTL."""
+        if self.expired:
+            await self.refresh()
+
+    async def refresh(self) -> str:
         if not (HUBSPOT_CLIENT_ID and HUBSPOT_CLIENT_SECRET and HUBSPOT_REFRESH_TOKEN):
             raise RuntimeError(
                 "HubSpot OAuth credentials missing: HUBSPOT_CLIENT_ID / HUBSPOT_CLIENT_SECRET / HUBSPOT_REFRESH_TOKEN"
             )
-        token_url = "https://api.hubapi.com/oauth/v1/token"
-        data = {
-            "grant_type": "refresh_token",
-            "client_id": HUBSPOT_CLIENT_ID,
-            "client_secret": HUBSPOT_CLIENT_SECRET,
-            "refresh_token": HUBSPOT_REFRESH_TOKEN,
-        }
-        r = requests.post(token_url, data=data, timeout=30)
-        r.raise_for_status()
-        new_token = r.json().get("access_token")
-        if not new_token:
-            raise RuntimeError("HubSpot refresh did not return access_token")
-        self._access_token = new_token
-        return new_token
+        async with self._lock:
+            # Another task may have refreshed while we waited on the lock.
+            if self._access_token and not self.expired:
+                return self._access_token
+            data = {
+                "grant_type": "refresh_token",
+                "client_id": HUBSPOT_CLIENT_ID,
+                "client_secret": HUBSPOT_CLIENT_SECRET,
+                "refresh_token": HUBSPOT_REFRESH_TOKEN,
+            }
+            r = await _hs_client().post("/oauth/v1/token", data=data)
+            r.raise_for_status()
+            body = r.json()
+            new_token = body.get("access_token")
+            if not new_token:
+                raise RuntimeError("HubSpot refresh did not return access_token")
+            self._access_token = new_token
+            # Renew a minute early so in-flight requests never carry a stale token.
+            self._expires_at = time.time() + float(body.get("expires_in", 1800)) - 60
+            _hs_client().headers["Authorization"] = f"Bearer {new_token}"
+            return new_token
 
 TOKEN = HubSpotTokenManager(HUBSPOT_ACCESS_TOKEN)
 
-def _is_expired_auth(resp: requests.Response) -> bool:
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+def _is_expired_auth(resp: httpx.Response) -> bool:
     if resp.status_code != 401:
         return False
     try:
@@ -70,47 +149,57 @@ def _is_expired_auth(resp: requests.Response) -> bool:
     except Exception:
         return False
 
-def hubspot_request(method: str, path: str, **kwargs) -> requests.Response:
-    """Send HubSpot API request with auto‑refresh on expired token. `path` begins with /crm/... or other root path."""
-    base = "https://api.hubapi.com"
-    headers = kwargs.pop("headers", {})
-    if TOKEN.access_token:
-        headers["Authorization"] = f"Bearer {TOKEN.access_token}"
-    headers.setdefault("Content-Type", "application/json")
+def _retry_after_seconds(resp: httpx.Response) -> float:
+    try:
+        return max(float(resp.headers.get("Retry-After", "1")), 0.0)
+    except ValueError:
+        return 1.0
 
-    resp = requests.request(method, base + path, headers=headers, timeout=30, **kwargs)
+async def hubspot_request(method: str, path: str, **kwargs) -> httpx.Response:
+    """Send HubSpot API request with auto‑refresh on expired token. `path` begins with /crm/... or other root path."""
+    # Auth lives on the shared client; refresh() rotates the client header.
+    await TOKEN.ensure_fresh()
+    resp = await _hs_client().request(method, path, **kwargs)
     if _is_expired_auth(resp):
-        TOKEN.refresh()
-        headers["Authorization"] = f"Bearer {TOKEN.access_token}"
-        resp = requests.request(method, base + path, headers=headers, timeout=30, **kwargs)
+        # Fallback for tokens revoked server-side before their tracked expiry.
+        TOKEN.invalidate()
+        await TOKEN.refresh()
+        resp = await _hs_client().request(method, path, **kwargs)
+    if resp.status_code == 429:
+        # HubSpot rate limit: honor Retry-After instead of failing fast or
+        # hammering the burst window harder.
+        delay = _retry_after_seconds(resp)
+        logger.warning("[HubSpot] 429 on %s %s; retrying in %.1fs", method, path, delay)
+        await asyncio.sleep(delay)
+        resp = await _hs_client().request(method, path, **kwargs)
     return resp
 
 # ─────────────────────── Helpers: HubSpot ─────────────────────
-def get_contact_details(contact_id: str) -> Dict[str, Any]:
+async def get_contact_details(contact_id: str) -> Dict[str, Any]:
     """Fetch contact details from HubSpot (v3)."""
     try:
-        r = hubspot_request("GET", f"/crm/v3/objects/contacts/{contact_id}")
+        r = await hubspot_request("GET", f"/crm/v3/objects/contacts/{contact_id}")
         r.raise_for_status()
-        return r.json()
-    except requests.RequestException as e:
+        return orjson.loads(r.content)
+    except httpx.HTTPError as e:
         return {"error": f"Failed to fetch contact: {e}"}
 
-def update_contact_status(contact_id: str, status: str, call_summary: Optional[str]) -> Dict[str, Any]:
+async def update_contact_status(contact_id: str, status: str, call_summary: Optional[str]) -> Dict[str, Any]:
     """Patch hs_lead_status + optional summary property on contact (v3)."""
     props = {"hs_lead_status": status}
     if call_summary:
         props[CALL_SUMMARY_PROPERTY] = call_summary
     try:
-        r = hubspot_request("PATCH", f"/crm/v3/objects/contacts/{contact_id}", json={"properties": props})
+        r = await hubspot_request("PATCH", f"/crm/v3/objects/contacts/{contact_id}", json={"properties": props})
         r.raise_for_status()
         return {"success": True, "message": f"Contact {contact_id} updated to {status}"}
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         return {"error": f"Failed to update contact: {e}"}
 
-def create_hs_logged_call(contact_id: str, body_text: str,
-                          status: str = "COMPLETED",
-                          direction: str = "OUTBOUND",
-                          timestamp_ms: Optional[int] = None) -> Dict[str, Any]:
+async def create_hs_logged_call(contact_id: str, body_text: str,
+                                status: str = "COMPLETED",
+                                direction: str = "OUTBOUND",
+                                timestamp_ms: Optional[int] = None) -> Dict[str, Any]:
     """
     Create a 'Logged call' card on the contact timeline (Engagements v1) to match n8n’s output.
     """
@@ -128,58 +217,157 @@ def create_hs_logged_call(contact_id: str, body_text: str,
         },
         "metadata": {
             "body": body_text or "",
-            "status": status,  
+            "status": status,
             "fromNumber": "",
             "toNumber": "",
             "durationMilliseconds": 0,
         }
     }
 
-    # v1 uses different root; call requests directly but reuse TOKEN + refresh logic
-    headers = {"Content-Type": "application/json"}
-    if TOKEN.access_token:
-        headers["Authorization"] = f"Bearer {TOKEN.access_token}"
-    url = "https://api.hubapi.com/engagements/v1/engagements"
-
     try:
-        r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=30)
-        if _is_expired_auth(r):
-            TOKEN.refresh()
-            headers["Authorization"] = f"Bearer {TOKEN.access_token}"
-            r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=30)
+        # v1 uses a different root path but the same host, so the shared
+        # client (auth + pooling + refresh) still applies. Encode once; the
+        # refresh retry inside hubspot_request reuses the same bytes.
+        r = await hubspot_request("POST", "/engagements/v1/engagements",
+                                  content=orjson.dumps(payload),
+                                  headers=_JSON_HEADERS)
         r.raise_for_status()
-        return {"success": True, "id": r.json().get("engagement", {}).get("id")}
+        return {"success": True, "id": orjson.loads(r.content).get("engagement", {}).get("id")}
     except Exception as e:
         return {"error": f"Failed to create logged call: {e}"}
 
+# ─────────────── Helpers: HubSpot batch writes ────────────────
+class HubSpotBatcher:
+    """Coalesces writes destined for a HubSpot batch endpoint.
+
+    Items queue in-process; a single flusher task posts them together at
+    most ``max_items`` per request (HubSpot's batch cap) and at least every
+    ``interval`` seconds, so a burst of end-of-call events costs one HTTP
+    round-trip instead of N.
+    """
+
+    def __init__(self, name: str, flush, *, max_items: int = 100, interval: float = 0.25):
+        self.name = name
+        self._flush = flush
+        self._max_items = max_items
+        self._interval = interval
+        self._pending: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def add(self, item: Dict[str, Any]) -> None:
+        """Enqueue one input; starts the flusher on first use."""
+        self._pending.append(item)
+        if len(self._pending) >= self._max_items:
+            self._wakeup.set()
+        if self._task is None and not self._closed:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._drain()
+
+    async def _drain(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending[:self._max_items], self._pending[self._max_items:]
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error("[HubSpot] batch flush (%s) failed: %s", self.name, e)
+
+    async def aclose(self) -> None:
+        """Stop the flusher and drain whatever is still pending."""
+        self._closed = True
+        if self._task:
+            self._wakeup.set()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._drain()
+
+async def _flush_contact_updates(inputs: List[Dict[str, Any]]) -> None:
+    r = await hubspot_request("POST", "/crm/v3/objects/contacts/batch/update", json={"inputs": inputs})
+    r.raise_for_status()
+
+CONTACT_UPDATE_BATCHER = HubSpotBatcher("contact-update", _flush_contact_updates)
+
+def call_log_input(contact_id: str, body_text: str,
+                   status: str = "COMPLETED",
+                   direction: str = "OUTBOUND",
+                   timestamp_ms: Optional[int] = None) -> Dict[str, Any]:
+    """Build one v3 calls batch/create input associated to a contact."""
+    if timestamp_ms is None:
+        timestamp_ms = int(time.time() * 1000)
+    return {
+        "properties": {
+            "hs_call_body": body_text or "",
+            "hs_timestamp": timestamp_ms,
+            "hs_call_status": status,
+            "hs_call_direction": direction,
+            "hs_call_duration": 0,
+        },
+        "associations": [{
+            # 194 = call → contact (HubSpot-defined association type)
+            "to": {"id": str(contact_id)},
+            "types": [{"associationCategory": "HUBSPOT_DEFINED", "associationTypeId": 194}],
+        }],
+    }
+
+async def _flush_call_logs(inputs: List[Dict[str, Any]]) -> None:
+    r = await hubspot_request("POST", "/crm/v3/objects/calls/batch/create", json={"inputs": inputs})
+    r.raise_for_status()
+
+CALL_LOG_BATCHER = HubSpotBatcher("call-log", _flush_call_logs, max_items=50)
+
 # ───────────────────── Helpers: Vapi client ───────────────────
-def initiate_vapi_call(phone_number: str, contact_name: str, lead_id: str) -> Dict[str, Any]:
+async def initiate_vapi_call(phone_number: str, contact_name: str, lead_id: str) -> Dict[str, Any]:
     """Start a Vapi call via Workflow; metadata.lead_id is the HubSpot contactId."""
     try:
-        url = "https://api.vapi.ai/v1/calls"
-        headers = {"Authorization": f"Bearer {VAPI_API_KEY}", "Content-Type": "application/json"}
         payload = {
             "workflow_id": VAPI_WORKFLOW_ID,
             "to": phone_number,
             "metadata": {"lead_id": lead_id, "name": contact_name},
-            "webhook_url": f"{BASE_URL}/webhook/vapi"
+            "webhook_url": VAPI_WEBHOOK_URL
         }
-        r = requests.post(url, headers=headers, json=payload, timeout=30)
+        r = await _vapi_client().post("/v1/calls", json=payload)
         r.raise_for_status()
-        return r.json()
-    except requests.RequestException as e:
+        return orjson.loads(r.content)
+    except httpx.HTTPError as e:
         return {"error": f"Failed to initiate Vapi call: {e}"}
 
 # ─────────────── Optional LLM (with safe fallback) ────────────
 _llm: Optional[ChatOpenAI] = None
 if OPENAI_API_KEY:
     try:
-        _llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, api_key=OPENAI_API_KEY)
+        _llm = ChatOpenAI(
+            model="gpt-4o-mini",
+            temperature=0,
+            api_key=OPENAI_API_KEY,
+            # The four analysis fields fit comfortably in 256 tokens.
+            max_tokens=256,
+            # JSON mode: the model must emit a parseable object, so no
+            # preamble tokens and no brace-hunting on our side.
+            model_kwargs={"response_format": {"type": "json_object"}},
+            # Pooled async transport so concurrent analyses share connections.
+            http_async_client=httpx.AsyncClient(http2=True),
+        )
     except Exception as e:
-        print("[LLM] init failed; using heuristic:", e)
+        logger.warning("[LLM] init failed; using heuristic: %s", e)
         _llm = None
 
-def analyze_call_result(transcript: str, summary: str, ended_reason: str) -> Dict[str, Any]:
+# Vapi re-delivers end-of-call reports (new eventId/timestamp, same content),
+# which slips past the idempotency layer; dedupe the LLM call by content hash.
+_ANALYSIS_CACHE: TTLCache = TTLCache(maxsize=5000, ttl=86400)
+
+async def analyze_call_result(transcript: str, summary: str, ended_reason: str) -> Dict[str, Any]:
     """Classify call + produce a compact CRM summary."""
     if not _llm:
         text = f"{summary} {transcript} {ended_reason}".lower()
@@ -191,6 +379,16 @@ def analyze_call_result(transcript: str, summary: str, ended_reason: str) -> Dic
             "hubspot_summary": summary or (transcript[:950] if transcript else "No summary provided.")
         }
 
+    # Long calls produce multi-KB transcripts billed per prefill token; the
+    # qualification signal sits in the closing turns and the Vapi summary
+    # covers the rest, so keep only the tail.
+    transcript = transcript[-4000:]
+
+    cache_key = hashlib.sha256(f"{transcript}{summary}{ended_reason}".encode()).hexdigest()
+    cached = _ANALYSIS_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
     prompt = f"""Return ONLY valid JSON.
 EndedReason: {ended_reason}
 Summary: {summary}
@@ -203,12 +401,10 @@ Fields:
 - hubspot_summary: compact professional summary
 """
     try:
-        resp = _llm.invoke([HumanMessage(content=prompt)])
-        content = resp.content.strip()
-        if not content.startswith("{"):
-            a, b = content.find("{"), content.rfind("}")
-            content = content[a:b+1] if a != -1 and b != -1 else "{}"
-        return json.loads(content or "{}")
+        resp = await _llm.ainvoke([HumanMessage(content=prompt)])
+        result = orjson.loads(resp.content or "{}")
+        _ANALYSIS_CACHE[cache_key] = result
+        return result
     except Exception as e:
         return {
             "connected": False,
@@ -249,15 +445,15 @@ def contact_processor(state: AgentState) -> AgentState:
         }
     }
 
-def call_initiator(state: AgentState) -> AgentState:
+async def call_initiator(state: AgentState) -> AgentState:
     if state.get("error"): return state
     c = state["contact_data"]
-    res = initiate_vapi_call(c["phone"], c["full_name"], c["id"])
+    res = await initiate_vapi_call(c["phone"], c["full_name"], c["id"])
     if "error" in res: return {**state, "error": res["error"]}
     return {**state, "call_result": res}
 
 def error_handler(state: AgentState) -> AgentState:
-    if state.get("error"): print("[Workflow Error]", state["error"])
+    if state.get("error"): logger.error("[Workflow Error] %s", state["error"])
     return state
 
 def create_workflow():
@@ -272,24 +468,27 @@ def create_workflow():
     g.add_edge("error_handler", END)
     return g.compile()
 
+# Compiled once at import: the nodes are pure functions, so the graph is
+# safely shared across concurrent background tasks.
+WORKFLOW = create_workflow()
+
 # ─────────────── Entry points used by the server ──────────────
-def handle_hubspot_webhook(event: Dict[str, Any]) -> None:
+async def handle_hubspot_webhook(event: Dict[str, Any]) -> None:
     """HubSpot app/webhook (contact.creation). Starts a Vapi call with LangGraph."""
     if event.get("subscriptionType") != "contact.creation":
-        print(f"[HubSpot] Ignoring subscriptionType={event.get('subscriptionType')}")
+        logger.info("[HubSpot] Ignoring subscriptionType=%s", event.get("subscriptionType"))
         return
 
     contact_id = str(event.get("objectId") or "")
     if not contact_id:
-        print("[HubSpot] Missing objectId")
+        logger.warning("[HubSpot] Missing objectId")
         return
 
-    contact = get_contact_details(contact_id)
+    contact = await get_contact_details(contact_id)
     if "error" in contact:
-        print("[HubSpot] fetch failed:", contact["error"])
+        logger.error("[HubSpot] fetch failed: %s", contact["error"])
         return
 
-    wf = create_workflow()
     initial: AgentState = {
         "contact_data": contact,
         "call_result": {},
@@ -298,15 +497,15 @@ def handle_hubspot_webhook(event: Dict[str, Any]) -> None:
         "messages": [],
         "error": ""
     }
-    result = wf.invoke(initial)
-    print("Lead processed:", {
+    result = await WORKFLOW.ainvoke(initial)
+    logger.info("Lead processed: %s", {
         "id": contact.get("id"),
         "phone": contact.get("properties", {}).get("phone"),
         "qualified": result.get("analysis_result", {}).get("qualified"),
         "hs_update": result.get("hubspot_update")
     })
 
-def process_vapi_end_of_call(normalized: Dict[str, Any]) -> None:
+async def process_vapi_end_of_call(normalized: Dict[str, Any]) -> None:
     """Called by /webhook/vapi after normalizing the payload."""
     lead_id     = normalized.get("metadata", {}).get("lead_id")
     summary     = normalized.get("summary") or ""
@@ -314,10 +513,10 @@ def process_vapi_end_of_call(normalized: Dict[str, Any]) -> None:
     ended       = normalized.get("endedReason") or ""
 
     if not lead_id:
-        print("[Vapi] Missing lead_id; cannot update HubSpot.")
+        logger.warning("[Vapi] Missing lead_id; cannot update HubSpot.")
         return
 
-    analysis = analyze_call_result(transcript, summary, ended)
+    analysis = await analyze_call_result(transcript, summary, ended)
     q = (analysis.get("qualified") or "not_applicable").lower()
     if q == "qualified":
         hs_status = HS_STATUS_OPEN_DEAL
@@ -326,15 +525,19 @@ def process_vapi_end_of_call(normalized: Dict[str, Any]) -> None:
     else:
         hs_status = HS_STATUS_CONTACTED
 
-    # Update contact property + status
-    upd = update_contact_status(str(lead_id), hs_status, analysis.get("hubspot_summary"))
-    print("[HubSpot] update result:", upd)
+    # Update contact property + status (coalesced into batch/update)
+    props = {"hs_lead_status": hs_status}
+    if analysis.get("hubspot_summary"):
+        props[CALL_SUMMARY_PROPERTY] = analysis["hubspot_summary"]
+    CONTACT_UPDATE_BATCHER.add({"id": str(lead_id), "properties": props})
+    logger.info("[HubSpot] update for %s queued (%s)", lead_id, hs_status)
 
-    # Create a “Logged call” card to match n8n
-    card = create_hs_logged_call(
+    # Create a “Logged call” card to match n8n (coalesced into batch/create;
+    # create_hs_logged_call remains the single-item path)
+    CALL_LOG_BATCHER.add(call_log_input(
         contact_id=str(lead_id),
         body_text=analysis.get("hubspot_summary") or summary or "Call summary unavailable.",
         status="COMPLETED",
         direction="OUTBOUND"
-    )
-    print("[HubSpot] logged call result:", card)
\ No newline at end of file
+    ))
+    logger.info("[HubSpot] logged call for %s queued", lead_id)
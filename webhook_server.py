@@ -1,32 +1,125 @@
 # webhook_server.py
-import os, json, time
-from typing import Any, Dict
+import os, threading, asyncio
+import logging, logging.handlers, queue
+from typing import Any, Dict, List, Optional
+
+import orjson
+from cachetools import TTLCache
 
 from dotenv import load_dotenv
 load_dotenv()  
 
-from fastapi import FastAPI, Request, BackgroundTasks, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from hubspot_vapi_agent import (
     handle_hubspot_webhook,
     process_vapi_end_of_call,
+    open_http_clients,
+    close_http_clients,
 )
 
-app = FastAPI(title="HubSpot ↔ Vapi Orchestrator")
+app = FastAPI(title="HubSpot ↔ Vapi Orchestrator", default_response_class=ORJSONResponse)
+
+VAPI_WEBHOOK_SECRET = os.getenv("VAPI_WEBHOOK_SECRET")
+DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
+
+# ─────────────── async-safe logging setup ─────────────────
+# Handlers write to stdout synchronously and would stall the event loop
+# under webhook bursts; route records through a queue so the I/O happens
+# on the listener thread instead of the request path.
+def _configure_logging() -> None:
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    listener = logging.handlers.QueueListener(q, handler, respect_handler_level=True)
+    listener.start()
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(q))
+    root.setLevel(logging.DEBUG if DEBUG else logging.INFO)
+
+_configure_logging()
+logger = logging.getLogger(__name__)
+
+# ─────────────── bounded task queue + workers ─────────────────
+# BackgroundTasks run on the request's event loop with no cap, so a burst
+# of contacts grows unbounded in memory and serializes behind the slowest
+# downstream call. A bounded queue gives backpressure (503 when full) and
+# a fixed worker pool drains it concurrently.
+TASK_QUEUE_SIZE = int(os.getenv("TASK_QUEUE_SIZE", "1000"))
+TASK_WORKERS    = int(os.getenv("TASK_WORKERS", "8"))
+
+TASK_QUEUE: Optional[asyncio.Queue] = None
+_worker_tasks: List[asyncio.Task] = []
+
+_HANDLERS = {
+    "hs": handle_hubspot_webhook,
+    "vapi": process_vapi_end_of_call,
+}
+
+async def _worker() -> None:
+    while True:
+        kind, payload = await TASK_QUEUE.get()
+        try:
+            await _HANDLERS[kind](payload)
+        except Exception:
+            logger.exception("background task (%s) failed", kind)
+        finally:
+            TASK_QUEUE.task_done()
+
+def enqueue(kind: str, payload: Dict[str, Any]) -> bool:
+    """Queue a webhook event for the worker pool; False when the queue is full."""
+    try:
+        TASK_QUEUE.put_nowait((kind, payload))
+        return True
+    except asyncio.QueueFull:
+        logger.warning("task queue full; rejecting %s event", kind)
+        return False
 
-VAPI_WEBHOOK_SECRET = os.getenv("VAPI_WEBHOOK_SECRET")  
+@app.on_event("startup")
+async def startup():
+    global TASK_QUEUE
+    open_http_clients()
+    TASK_QUEUE = asyncio.Queue(maxsize=TASK_QUEUE_SIZE)
+    _worker_tasks.extend(asyncio.create_task(_worker()) for _ in range(TASK_WORKERS))
+
+@app.on_event("shutdown")
+async def shutdown():
+    if TASK_QUEUE is not None:
+        await TASK_QUEUE.join()
+    for t in _worker_tasks:
+        t.cancel()
+    _worker_tasks.clear()
+    await close_http_clients()
+
+# ────────────── TTL-based idempotency ──────────────
+# Per-key one-hour TTL with LRU eviction, so a burst past the size cap
+# evicts oldest keys one at a time instead of wiping all dedup state.
+# Note: in-process only — with multiple Uvicorn workers, back this with
+# Redis (SET key NX EX 3600) instead.
+SEEN: TTLCache = TTLCache(maxsize=50_000, ttl=3600)
+_SEEN_LOCK = threading.Lock()
 
-# ────────────── naive hourly idempotency ──────────────
-SEEN = set()
 def idempotent(key: str) -> bool:
-    bucket = f"{key}:{int(time.time())//3600}"
-    if bucket in SEEN:
-        return False
-    if len(SEEN) > 10_000:
-        SEEN.clear()
-    SEEN.add(bucket)
-    return True
+    with _SEEN_LOCK:
+        if key in SEEN:
+            return False
+        SEEN[key] = True
+        return True
+
+def forget(key: str) -> None:
+    """Un-mark a key so the sender's redelivery isn't treated as a duplicate."""
+    with _SEEN_LOCK:
+        SEEN.pop(key, None)
+
+def event_key(ev: Dict[str, Any]) -> Optional[str]:
+    """Dedup key for a webhook event, or None when it carries no usable id.
+
+    HubSpot app webhooks always include eventId, so rather than hashing the
+    whole event body as a fallback we treat id-less events as malformed.
+    """
+    key = ev.get("eventId") or ev.get("objectId")
+    return str(key) if key else None
 
 @app.get("/health")
 async def health():
@@ -34,36 +127,49 @@ async def health():
 
 # ───────────────── HubSpot webhook ────────────────────
 @app.post("/webhook/hubspot")
-async def hubspot(request: Request, bg: BackgroundTasks):
+async def hubspot(request: Request):
     raw = await request.body()
-    print("RAW HUBSPOT BODY:", raw.decode(errors="ignore")[:1200])
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("raw hubspot body (%d bytes): %s", len(raw), raw.decode(errors="ignore")[:1200])
 
+    # Parse the already-buffered body directly; request.json() would re-walk
+    # Starlette's json path a second time.
     try:
-        payload = await request.json()
+        payload = orjson.loads(raw)
     except Exception:
         return JSONResponse({"status": "bad json"}, status_code=200)
 
     # App webhooks commonly send an array of events
     if isinstance(payload, list):
-        print(f"[HS] {len(payload)} event(s)")
+        logger.info("[HS] %d event(s)", len(payload))
         for ev in payload:
-            idem = ev.get("eventId") or ev.get("objectId") or json.dumps(ev, sort_keys=True)
-            if idempotent(f"hs:{idem}"):
-                bg.add_task(handle_hubspot_webhook, ev)
+            key = event_key(ev)
+            if key is None:
+                logger.warning("[HS] event missing eventId/objectId; skipping")
+                continue
+            if idempotent(f"hs:{key}") and not enqueue("hs", ev):
+                # 503 tells HubSpot to redeliver; dedup keeps the already
+                # queued events from running twice on the retry.
+                forget(f"hs:{key}")
+                return JSONResponse({"status": "queue full"}, status_code=503)
         return JSONResponse({"status": "accepted"}, status_code=202)
 
     # Workflow webhook can be a single object
     if isinstance(payload, dict):
-        idem = payload.get("eventId") or payload.get("objectId") or json.dumps(payload, sort_keys=True)
-        if idempotent(f"hs:{idem}"):
-            bg.add_task(handle_hubspot_webhook, payload)
+        key = event_key(payload)
+        if key is None:
+            logger.warning("[HS] event missing eventId/objectId; skipping")
+            return JSONResponse({"status": "ignored"}, status_code=200)
+        if idempotent(f"hs:{key}") and not enqueue("hs", payload):
+            forget(f"hs:{key}")
+            return JSONResponse({"status": "queue full"}, status_code=503)
         return JSONResponse({"status": "accepted"}, status_code=202)
 
     return JSONResponse({"status": "ignored"}, status_code=200)
 
 # ─────────────────── Vapi webhook ─────────────────────
 @app.post("/webhook/vapi")
-async def vapi(request: Request, bg: BackgroundTasks):
+async def vapi(request: Request):
     # Optional secret check
     if VAPI_WEBHOOK_SECRET:
         incoming = request.headers.get("x-vapi-secret")
@@ -71,10 +177,11 @@ async def vapi(request: Request, bg: BackgroundTasks):
             raise HTTPException(status_code=401, detail="unauthorized")
 
     raw = await request.body()
-    print("RAW VAPI BODY:", raw.decode(errors="ignore")[:1500])
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("raw vapi body (%d bytes): %s", len(raw), raw.decode(errors="ignore")[:1500])
 
     try:
-        payload: Dict[str, Any] = await request.json()
+        payload: Dict[str, Any] = orjson.loads(raw)
     except Exception:
         return JSONResponse({"status": "bad json"}, status_code=200)
 
@@ -93,9 +200,10 @@ async def vapi(request: Request, bg: BackgroundTasks):
     answers      = analysis.get("structuredData") or {}
     metadata     = call.get("metadata", {}) or {}
 
-    print(f"[VAPI] type={event_type} call_id={call_id} ended_reason={ended_reason}")
-    print("SUMMARY:", summary[:300])
-    print("TRANSCRIPT LEN:", len(transcript))
+    logger.info("[VAPI] type=%s call_id=%s ended_reason=%s transcript_len=%d",
+                event_type, call_id, ended_reason, len(transcript))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("summary: %s", summary[:300])
 
     idem = f"{event_type}:{call_id}:{msg.get('timestamp','')}"
     if not idempotent(f"vapi:{idem}"):
@@ -112,6 +220,8 @@ async def vapi(request: Request, bg: BackgroundTasks):
             "answers": answers,
             "metadata": metadata,
         }
-        bg.add_task(process_vapi_end_of_call, normalized)
+        if not enqueue("vapi", normalized):
+            forget(f"vapi:{idem}")
+            return JSONResponse({"status": "queue full"}, status_code=503)
 
     return JSONResponse({"status": "accepted"}, status_code=202)
\ No newline at end of file